@@ -4,15 +4,17 @@
 Produces a simple, recognizable crab silhouette in orange/red tones
 on a dark background — suitable for terminal app branding.
 
-Requirements: Python 3, Pillow
-Tools used: iconutil (macOS), Pillow for ICO
+Requirements: Python 3, Pillow (or Pillow-SIMD, see requirements-fast.txt)
+Tools used: Pillow for drawing and PNG encoding; the ICO and ICNS
+containers are written directly, so no platform-specific tooling is needed.
 """
 
+import functools
+import io
 import math
 import os
-import shutil
-import subprocess
-import tempfile
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from PIL import Image, ImageDraw
@@ -28,6 +30,35 @@ CLAW_COLOR = (200, 65, 35)        # Claw color
 EYE_WHITE = (240, 240, 240)       # Eye whites
 EYE_PUPIL = (20, 20, 30)          # Eye pupils
 CHAT_COLOR = (100, 200, 255)      # Chat bubble accent (light blue)
+VIGNETTE_COLOR = (40, 40, 55)     # Circle behind the crab
+
+# The crab is drawn into a palette ("P") image using these colors and
+# converted to RGBA once at the end, so every fill is a one-byte store.
+PALETTE = [
+    BG_COLOR, VIGNETTE_COLOR, CRAB_BODY, CRAB_DARK, CRAB_HIGHLIGHT,
+    CLAW_COLOR, EYE_WHITE, EYE_PUPIL, CHAT_COLOR,
+]
+INK = {color: index for index, color in enumerate(PALETTE)}
+
+# zlib level for PNG output. The icons are mostly flat color, so level 1
+# is several times faster than Pillow's default of 6 for a modest size cost.
+PNG_COMPRESS_LEVEL = 1
+
+# Windows .ico entry sizes
+ICO_SIZES = [16, 32, 48, 64, 128, 256]
+
+# .icns entry types (PNG payloads) and their pixel sizes
+ICNS_TYPES = {
+    b"icp4": 16,
+    b"icp5": 32,
+    b"ic11": 32,   # 16x16@2x
+    b"ic12": 64,   # 32x32@2x
+    b"ic07": 128,
+    b"ic13": 256,  # 128x128@2x
+    b"ic08": 256,
+    b"ic14": 512,  # 256x256@2x
+    b"ic09": 512,
+}
 
 
 def draw_ellipse(draw, cx, cy, rx, ry, fill, outline=None):
@@ -36,15 +67,13 @@ def draw_ellipse(draw, cx, cy, rx, ry, fill, outline=None):
 
 
 def draw_crab(img, size=512):
-    """Draw a stylized crab icon onto the image."""
+    """Draw a stylized crab icon onto a PALETTE image pre-filled with BG_COLOR."""
     draw = ImageDraw.Draw(img)
     s = size  # shorthand
 
-    # --- Background: rounded rectangle feel via full fill + circle ---
-    draw.rectangle([0, 0, s, s], fill=BG_COLOR)
-
+    # --- Background: Image.new already filled the canvas, add a circle ---
     # Subtle circular vignette behind crab
-    draw_ellipse(draw, s // 2, s // 2, int(s * 0.42), int(s * 0.42), fill=(40, 40, 55))
+    draw_ellipse(draw, s // 2, s // 2, int(s * 0.42), int(s * 0.42), fill=INK[VIGNETTE_COLOR])
 
     cx, cy = s // 2, int(s * 0.52)  # Center of crab body, slightly below center
 
@@ -52,177 +81,219 @@ def draw_crab(img, size=512):
     leg_origins = [
         (0.18, 0.48), (0.14, 0.55), (0.13, 0.63),  # left
     ]
+    # Each leg and its foot share an endpoint but use different stroke
+    # widths, so they can't be merged into one polyline. Hoist everything
+    # that doesn't depend on the leg out of the loop instead.
+    leg_w = max(s // 50, 3)
+    foot_w = max(s // 60, 2)
+    foot_dx, foot_dy = s * 0.02, s * 0.03
+    x1 = int(cx - s * 0.15)
+    x1_r = int(cx + s * 0.15)
     for lx_frac, ly_frac in leg_origins:
-        # Left leg
-        x1 = int(cx - s * 0.15)
         y1 = int(s * ly_frac)
-        x2 = int(s * lx_frac)
         y2 = int(s * (ly_frac + 0.08))
-        draw.line([x1, y1, x2, y2], fill=CRAB_DARK, width=max(s // 50, 3))
-        # small foot
-        draw.line([x2, y2, int(x2 - s * 0.02), int(y2 + s * 0.03)],
-                  fill=CRAB_DARK, width=max(s // 60, 2))
+        foot_y = int(y2 + foot_dy)
+
+        # Left leg and small foot
+        x2 = int(s * lx_frac)
+        draw.line([x1, y1, x2, y2], fill=INK[CRAB_DARK], width=leg_w)
+        draw.line([x2, y2, int(x2 - foot_dx), foot_y], fill=INK[CRAB_DARK], width=foot_w)
 
         # Right leg (mirror)
-        x1_r = int(cx + s * 0.15)
         x2_r = int(s * (1 - lx_frac))
-        draw.line([x1_r, y1, x2_r, y2], fill=CRAB_DARK, width=max(s // 50, 3))
-        draw.line([x2_r, y2, int(x2_r + s * 0.02), int(y2 + s * 0.03)],
-                  fill=CRAB_DARK, width=max(s // 60, 2))
+        draw.line([x1_r, y1, x2_r, y2], fill=INK[CRAB_DARK], width=leg_w)
+        draw.line([x2_r, y2, int(x2_r + foot_dx), foot_y], fill=INK[CRAB_DARK], width=foot_w)
 
     # --- Claws (two big claws on top-sides) ---
-    # Left claw arm
+    # Left and right claws mirror each other: side is -1 (left) or +1 (right),
+    # and the y coordinates are shared, so compute those once.
     claw_arm_w = max(s // 30, 4)
-    # Arm segment
-    la_x1, la_y1 = int(cx - s * 0.16), int(cy - s * 0.04)
-    la_x2, la_y2 = int(cx - s * 0.28), int(cy - s * 0.16)
-    draw.line([la_x1, la_y1, la_x2, la_y2], fill=CLAW_COLOR, width=claw_arm_w)
-    # Upper arm to claw
-    la_x3, la_y3 = int(cx - s * 0.32), int(cy - s * 0.26)
-    draw.line([la_x2, la_y2, la_x3, la_y3], fill=CLAW_COLOR, width=claw_arm_w)
-    # Claw (pincer) - two arcs
     claw_r = int(s * 0.055)
-    # Top pincer
-    draw_ellipse(draw, int(la_x3 - claw_r * 0.3), int(la_y3 - claw_r * 0.5),
-                 claw_r, int(claw_r * 0.7), fill=CRAB_BODY)
-    # Bottom pincer
-    draw_ellipse(draw, int(la_x3 + claw_r * 0.3), int(la_y3 + claw_r * 0.3),
-                 claw_r, int(claw_r * 0.6), fill=CRAB_BODY)
-
-    # Right claw arm (mirror)
-    ra_x1, ra_y1 = int(cx + s * 0.16), int(cy - s * 0.04)
-    ra_x2, ra_y2 = int(cx + s * 0.28), int(cy - s * 0.16)
-    draw.line([ra_x1, ra_y1, ra_x2, ra_y2], fill=CLAW_COLOR, width=claw_arm_w)
-    ra_x3, ra_y3 = int(cx + s * 0.32), int(cy - s * 0.26)
-    draw.line([ra_x2, ra_y2, ra_x3, ra_y3], fill=CLAW_COLOR, width=claw_arm_w)
-    claw_r = int(s * 0.055)
-    draw_ellipse(draw, int(ra_x3 + claw_r * 0.3), int(ra_y3 - claw_r * 0.5),
-                 claw_r, int(claw_r * 0.7), fill=CRAB_BODY)
-    draw_ellipse(draw, int(ra_x3 - claw_r * 0.3), int(ra_y3 + claw_r * 0.3),
-                 claw_r, int(claw_r * 0.6), fill=CRAB_BODY)
+    claw_y1, claw_y2, claw_y3 = int(cy - s * 0.04), int(cy - s * 0.16), int(cy - s * 0.26)
+    top_pincer_y, top_pincer_ry = int(claw_y3 - claw_r * 0.5), int(claw_r * 0.7)
+    bot_pincer_y, bot_pincer_ry = int(claw_y3 + claw_r * 0.3), int(claw_r * 0.6)
+    for side in (-1, 1):
+        # Arm segment
+        x1 = int(cx + side * s * 0.16)
+        x2 = int(cx + side * s * 0.28)
+        draw.line([x1, claw_y1, x2, claw_y2], fill=INK[CLAW_COLOR], width=claw_arm_w)
+        # Upper arm to claw
+        x3 = int(cx + side * s * 0.32)
+        draw.line([x2, claw_y2, x3, claw_y3], fill=INK[CLAW_COLOR], width=claw_arm_w)
+        # Claw (pincer) - top pincer leans outward, bottom pincer inward
+        draw_ellipse(draw, int(x3 + side * claw_r * 0.3), top_pincer_y,
+                     claw_r, top_pincer_ry, fill=INK[CRAB_BODY])
+        draw_ellipse(draw, int(x3 - side * claw_r * 0.3), bot_pincer_y,
+                     claw_r, bot_pincer_ry, fill=INK[CRAB_BODY])
 
     # --- Body (main oval) ---
     body_rx = int(s * 0.20)
     body_ry = int(s * 0.15)
-    draw_ellipse(draw, cx, cy, body_rx, body_ry, fill=CRAB_BODY)
+    draw_ellipse(draw, cx, cy, body_rx, body_ry, fill=INK[CRAB_BODY])
 
     # Body highlight (smaller oval, slightly up-left)
     highlight_rx = int(body_rx * 0.6)
     highlight_ry = int(body_ry * 0.5)
     draw_ellipse(draw, int(cx - body_rx * 0.15), int(cy - body_ry * 0.25),
-                 highlight_rx, highlight_ry, fill=CRAB_HIGHLIGHT)
-
-    # Body shell lines (subtle arcs for texture)
+                 highlight_rx, highlight_ry, fill=INK[CRAB_HIGHLIGHT])
+
+    # Body shell lines (subtle arcs for texture). The three arcs only differ
+    # by their vertical offset, so rasterize one into a stamp and blit it.
+    arc_x1 = int(cx - body_rx * 0.5)
+    arc_x2 = int(cx + body_rx * 0.5)
+    arc_h = int(body_ry * 0.3)
+    stamp = Image.new("L", (arc_x2 - arc_x1 + 1, arc_h + 1), 0)
+    ImageDraw.Draw(stamp).arc([0, 0, arc_x2 - arc_x1, arc_h],
+                              start=0, end=180, fill=255, width=max(s // 200, 1))
     for i in range(3):
         arc_y = int(cy - body_ry * 0.1 + i * body_ry * 0.35)
-        arc_x1 = int(cx - body_rx * 0.5)
-        arc_x2 = int(cx + body_rx * 0.5)
-        draw.arc([arc_x1, arc_y, arc_x2, int(arc_y + body_ry * 0.3)],
-                 start=0, end=180, fill=CRAB_DARK, width=max(s // 200, 1))
+        img.paste(INK[CRAB_DARK], (arc_x1, arc_y, arc_x1 + stamp.width, arc_y + stamp.height),
+                  mask=stamp)
 
     # --- Eyes (on stalks) ---
     eye_r = int(s * 0.03)
-    # Left eye stalk
-    le_base_x, le_base_y = int(cx - s * 0.08), int(cy - body_ry + s * 0.01)
-    le_top_x, le_top_y = int(cx - s * 0.11), int(cy - body_ry - s * 0.06)
-    draw.line([le_base_x, le_base_y, le_top_x, le_top_y],
-              fill=CRAB_DARK, width=max(s // 60, 3))
-    draw_ellipse(draw, le_top_x, le_top_y, eye_r, eye_r, fill=EYE_WHITE)
-    draw_ellipse(draw, le_top_x + 1, le_top_y, int(eye_r * 0.55), int(eye_r * 0.55),
-                 fill=EYE_PUPIL)
-
-    # Right eye stalk
-    re_base_x, re_base_y = int(cx + s * 0.08), int(cy - body_ry + s * 0.01)
-    re_top_x, re_top_y = int(cx + s * 0.11), int(cy - body_ry - s * 0.06)
-    draw.line([re_base_x, re_base_y, re_top_x, re_top_y],
-              fill=CRAB_DARK, width=max(s // 60, 3))
-    draw_ellipse(draw, re_top_x, re_top_y, eye_r, eye_r, fill=EYE_WHITE)
-    draw_ellipse(draw, re_top_x - 1, re_top_y, int(eye_r * 0.55), int(eye_r * 0.55),
-                 fill=EYE_PUPIL)
+    pupil_r = int(eye_r * 0.55)
+    stalk_w = max(s // 60, 3)
+    eye_base_y = int(cy - body_ry + s * 0.01)
+    eye_top_y = int(cy - body_ry - s * 0.06)
+    for side in (-1, 1):
+        base_x = int(cx + side * s * 0.08)
+        top_x = int(cx + side * s * 0.11)
+        draw.line([base_x, eye_base_y, top_x, eye_top_y], fill=INK[CRAB_DARK], width=stalk_w)
+        draw_ellipse(draw, top_x, eye_top_y, eye_r, eye_r, fill=INK[EYE_WHITE])
+        # Pupils look slightly inward
+        draw_ellipse(draw, top_x - side, eye_top_y, pupil_r, pupil_r, fill=INK[EYE_PUPIL])
 
     # --- Chat bubble (small speech bubble to the upper-right) ---
     bub_cx = int(cx + s * 0.22)
     bub_cy = int(cy - s * 0.22)
     bub_rx = int(s * 0.09)
     bub_ry = int(s * 0.065)
-    draw_ellipse(draw, bub_cx, bub_cy, bub_rx, bub_ry, fill=CHAT_COLOR)
+    draw_ellipse(draw, bub_cx, bub_cy, bub_rx, bub_ry, fill=INK[CHAT_COLOR])
     # Bubble tail (small triangle pointing to crab)
     tail_pts = [
         (int(bub_cx - bub_rx * 0.5), int(bub_cy + bub_ry * 0.7)),
         (int(bub_cx - bub_rx * 1.0), int(bub_cy + bub_ry * 1.5)),
         (int(bub_cx - bub_rx * 0.0), int(bub_cy + bub_ry * 0.9)),
     ]
-    draw.polygon(tail_pts, fill=CHAT_COLOR)
+    draw.polygon(tail_pts, fill=INK[CHAT_COLOR])
     # Three dots inside bubble
     dot_r = int(s * 0.012)
     for i in range(3):
         dx = int(bub_cx - s * 0.03 + i * s * 0.03)
-        draw_ellipse(draw, dx, bub_cy, dot_r, dot_r, fill=BG_COLOR)
+        draw_ellipse(draw, dx, bub_cy, dot_r, dot_r, fill=INK[BG_COLOR])
 
     return img
 
 
+@functools.lru_cache(maxsize=8)
+def _render_crab_cached(size):
+    """Render the crab at the given size and return its raw RGBA bytes.
+
+    Raw bytes are cached rather than the Image itself so callers can't
+    mutate the cached copy.
+    """
+    img = Image.new("P", (size, size), INK[BG_COLOR])
+    img.putpalette([channel for color in PALETTE for channel in color])
+    draw_crab(img, size)
+    return img.convert("RGBA").tobytes()
+
+
 def generate_png(size=512):
     """Generate the main PNG icon."""
-    img = Image.new("RGBA", (size, size), BG_COLOR)
-    draw_crab(img, size)
+    img = Image.frombytes("RGBA", (size, size), _render_crab_cached(size))
     out = ASSETS_DIR / "icon.png"
-    img.save(out, "PNG")
+    img.save(out, "PNG", compress_level=PNG_COMPRESS_LEVEL, optimize=False)
     print(f"Generated {out} ({size}x{size})")
     return img
 
 
-def generate_ico(base_img):
+def resize_icons(base_img, sizes):
+    """Downsample the master image once per unique size.
+
+    ICO and ICNS share most of their sizes, so both formats pick from
+    this dict instead of resampling the master again. Sizes up to 48px
+    use a box filter: LANCZOS' extra taps aren't visible that small and
+    cost several times more per output pixel.
+    """
+    return {
+        sz: base_img.resize((sz, sz), Image.BOX if sz <= 48 else Image.LANCZOS)
+        for sz in sorted(set(sizes))
+    }
+
+
+def _encode_png(img):
+    """Encode an image as PNG bytes in memory."""
+    buf = io.BytesIO()
+    img.save(buf, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+    return buf.getvalue()
+
+
+def encode_icons(resized):
+    """Encode every resized image to PNG bytes once, keyed by size.
+
+    Both containers embed PNG payloads, so ICO and ICNS assemble their
+    files from these blobs. Pillow releases the GIL while encoding, so
+    the encodes overlap across threads.
+    """
+    sizes = sorted(resized)
+    with ThreadPoolExecutor(max_workers=min(len(sizes), os.cpu_count() or 1)) as ex:
+        return dict(zip(sizes, ex.map(lambda sz: _encode_png(resized[sz]), sizes)))
+
+
+def _write_ico(out_path, pngs_by_size):
+    """Write an .ico container from a mapping of pixel size to PNG bytes.
+
+    The format is a little-endian ICONDIR header followed by one 16-byte
+    ICONDIRENTRY per image and then the image data. A width/height of 0
+    means 256.
+    """
+    offset = 6 + 16 * len(pngs_by_size)
+    with open(out_path, "wb") as f:
+        f.write(struct.pack("<HHH", 0, 1, len(pngs_by_size)))
+        for sz, data in pngs_by_size.items():
+            f.write(struct.pack("<BBBBHHII", sz % 256, sz % 256, 0, 0, 1, 32,
+                                len(data), offset))
+            offset += len(data)
+        for data in pngs_by_size.values():
+            f.write(data)
+
+
+def generate_ico(pngs):
     """Generate Windows .ico with multiple sizes."""
-    sizes = [16, 32, 48, 64, 128, 256]
     out = ASSETS_DIR / "icon.ico"
-    # Pillow ICO save requires passing sizes as the target icon sizes
-    # and the image will be resized to each. We save from the largest image.
-    base_rgba = base_img.convert("RGBA")
-    base_rgba.save(out, format="ICO", sizes=[(sz, sz) for sz in sizes])
-    print(f"Generated {out} (sizes: {sizes})")
-
-
-def generate_icns(base_img):
-    """Generate macOS .icns using iconutil."""
-    if shutil.which("iconutil") is None:
-        print("iconutil not found — skipping .icns generation (macOS only)")
-        return
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        iconset_dir = Path(tmpdir) / "icon.iconset"
-        iconset_dir.mkdir()
-
-        # Required sizes for iconutil
-        icon_sizes = {
-            "icon_16x16.png": 16,
-            "icon_16x16@2x.png": 32,
-            "icon_32x32.png": 32,
-            "icon_32x32@2x.png": 64,
-            "icon_128x128.png": 128,
-            "icon_128x128@2x.png": 256,
-            "icon_256x256.png": 256,
-            "icon_256x256@2x.png": 512,
-            "icon_512x512.png": 512,
-        }
-
-        for name, sz in icon_sizes.items():
-            resized = base_img.resize((sz, sz), Image.LANCZOS)
-            resized.save(iconset_dir / name, "PNG")
-
-        out = ASSETS_DIR / "icon.icns"
-        subprocess.run(
-            ["iconutil", "-c", "icns", str(iconset_dir), "-o", str(out)],
-            check=True,
-        )
-        print(f"Generated {out}")
+    _write_ico(out, {sz: pngs[sz] for sz in ICO_SIZES})
+    print(f"Generated {out} (sizes: {ICO_SIZES})")
+
+
+def _write_icns(out_path, pngs_by_type):
+    """Write an .icns container from a mapping of OSType to PNG bytes.
+
+    The format is a big-endian header (b"icns", total length) followed by
+    one (OSType, entry length, data) record per image.
+    """
+    total = 8 + sum(8 + len(data) for data in pngs_by_type.values())
+    with open(out_path, "wb") as f:
+        f.write(struct.pack(">4sI", b"icns", total))
+        for ostype, data in pngs_by_type.items():
+            f.write(struct.pack(">4sI", ostype, 8 + len(data)))
+            f.write(data)
+
+
+def generate_icns(pngs):
+    """Generate macOS .icns by writing the container directly."""
+    out = ASSETS_DIR / "icon.icns"
+    _write_icns(out, {ostype: pngs[sz] for ostype, sz in ICNS_TYPES.items()})
+    print(f"Generated {out}")
 
 
 def main():
     ASSETS_DIR.mkdir(parents=True, exist_ok=True)
     base_img = generate_png(512)
-    generate_ico(base_img)
-    generate_icns(base_img)
+    resized = resize_icons(base_img, ICO_SIZES + list(ICNS_TYPES.values()))
+    pngs = encode_icons(resized)
+    generate_ico(pngs)
+    generate_icns(pngs)
     print("Done! All icons generated in assets/")
 
 